@@ -1,31 +1,34 @@
 import argparse
+import functools
 import json
 import re
 import sys
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Any
 
+from http_cache import http_get_cached, http_get_text, http_get_text_cached, json_loads
+
 
 SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 
+# http_cache TTLs: SEC's ticker map changes at most daily; a transcript page is immutable once it
+# carries the transcript (incomplete pages are not cached, see the `cacheable` checks).
+SEC_TICKERS_TTL_SECONDS = 24 * 3600
+TRANSCRIPT_TTL_SECONDS = 90 * 24 * 3600
 
-def _http_get_text(url: str, *, user_agent: str) -> str:
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": user_agent,
-            "Accept": "application/json,text/html,*/*",
-        },
-        method="GET",
-    )
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read()
-        charset = resp.headers.get_content_charset() or "utf-8"
-    return raw.decode(charset, errors="replace")
+# SEC asks for <= 10 req/s per client; keep per-ticker fan-out well below that.
+_MAX_ENRICH_WORKERS = 8
+
+_RE_YQ = re.compile(r"/y/(\d{4})/q/(q[1-4])\b")
+_RE_MMDDYYYY = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+_RE_QUARTER = re.compile(r"q[1-4]")
+_RE_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DATE_SCAN_PREFIX = 8192
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_ticker(ticker: str) -> str:
     return str(ticker).strip().upper()
 
@@ -43,7 +46,13 @@ def _ticker_candidates(ticker: str) -> list[str]:
     # common special-case used by earningscall.biz
     if t == "googl":
         out.append("goog")
-    return list(dict.fromkeys(out))
+    if len(out) == 1:
+        return out
+    uniq: list[str] = []
+    for x in out:
+        if x not in uniq:
+            uniq.append(x)
+    return uniq
 
 
 def _cik_to_10_digits(cik: int | str) -> str:
@@ -62,22 +71,45 @@ class EarningsCallMeta:
     call_date: str | None  # YYYY-MM-DD
 
 
+@functools.lru_cache(maxsize=4096)
+def _fetch_listing_latest_yq(symbol: str, exchange: str, user_agent: str) -> tuple[int, str] | None:
+    """
+    Latest (year, quarter) linked from an earningscall.biz listing page, or None.
+    Cached per process, so misses (404s, empty listings) are only fetched once.
+    """
+    listing_url = f"https://earningscall.biz/e/{exchange}/s/{symbol}"
+    try:
+        listing_html = http_get_text(listing_url, user_agent=user_agent)
+    except Exception:
+        return None
+
+    m = _RE_YQ.search(listing_html)
+    if not m:
+        return None
+    return int(m.group(1)), m.group(2)
+
+
 def _discover_latest_earnings_call(
     *,
     ticker: str,
     user_agent: str,
     exchanges: list[str] | None = None,
+    need_date: bool = True,
 ) -> EarningsCallMeta | None:
-    exchanges = exchanges or ["nasdaq", "nyse", "amex"]
+    """
+    Find the latest earnings call on earningscall.biz.
 
-    def first_yq(listing_html: str) -> tuple[int, str] | None:
-        m = re.search(r"/y/(\d{4})/q/(q[1-4])\b", listing_html)
-        if not m:
-            return None
-        return int(m.group(1)), m.group(2)
+    need_date=False skips downloading the transcript page (call_date is then None);
+    the listing page already links to the transcript, which is enough to locate it.
+    """
+    exchanges = exchanges or ["nasdaq", "nyse", "amex"]
 
     def first_mmddyyyy(page_html: str) -> str | None:
-        m = re.search(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b", page_html)
+        # The call date sits in the page header; scan a prefix first and only fall back
+        # to the full page when nothing (or a match cut at the prefix boundary) is found.
+        m = _RE_MMDDYYYY.search(page_html, 0, _DATE_SCAN_PREFIX)
+        if m is None or m.end() >= _DATE_SCAN_PREFIX:
+            m = _RE_MMDDYYYY.search(page_html)
         if not m:
             return None
         mm, dd, yy = map(int, m.groups())
@@ -85,29 +117,34 @@ def _discover_latest_earnings_call(
 
     for symbol in _ticker_candidates(ticker):
         for ex in exchanges:
-            listing_url = f"https://earningscall.biz/e/{ex}/s/{symbol}"
-            try:
-                listing_html = _http_get_text(listing_url, user_agent=user_agent)
-            except Exception:
-                continue
-
-            yq = first_yq(listing_html)
+            yq = _fetch_listing_latest_yq(symbol, ex, user_agent)
             if not yq:
                 continue
 
             year, quarter = yq
             transcript_url = f"https://earningscall.biz/e/{ex}/s/{symbol}/y/{year}/q/{quarter}"
-            try:
-                transcript_html = _http_get_text(transcript_url, user_agent=user_agent)
-            except Exception:
-                continue
+            call_date = None
+            if need_date:
+                try:
+                    transcript_html = http_get_text_cached(
+                        transcript_url,
+                        user_agent=user_agent,
+                        ttl_seconds=TRANSCRIPT_TTL_SECONDS,
+                        # Only a page that already shows the call date is final enough to keep.
+                        cacheable=lambda page: first_mmddyyyy(page) is not None,
+                    )
+                except Exception:
+                    # Transcript page unavailable: report no call rather than one with a null date
+                    # (update_existing would overwrite a known earnings_call.date); try the next candidate.
+                    continue
+                call_date = first_mmddyyyy(transcript_html)
 
             return EarningsCallMeta(
                 exchange=ex,
                 symbol=symbol,
                 year=year,
                 quarter=quarter,
-                call_date=first_mmddyyyy(transcript_html),
+                call_date=call_date,
             )
 
     return None
@@ -119,8 +156,8 @@ def _load_sec_company_tickers(*, user_agent: str) -> list[dict[str, Any]]:
     Shape example:
       {"0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."}, ...}
     """
-    text = _http_get_text(SEC_TICKERS_URL, user_agent=user_agent)
-    data = json.loads(text)
+    raw, _ = http_get_cached(SEC_TICKERS_URL, user_agent=user_agent, ttl_seconds=SEC_TICKERS_TTL_SECONDS)
+    data = json_loads(raw)
     if not isinstance(data, dict):
         raise ValueError("Unexpected SEC tickers JSON shape")
 
@@ -131,23 +168,30 @@ def _load_sec_company_tickers(*, user_agent: str) -> list[dict[str, Any]]:
     return rows
 
 
-def _sec_lookup_by_ticker(sec_rows: list[dict[str, Any]], ticker: str) -> dict[str, Any] | None:
-    wanted = _normalize_ticker(ticker)
+def _sec_index_key(ticker: str) -> str:
+    # try to be forgiving for dot vs dash
+    return _normalize_ticker(ticker).replace(".", "-")
 
-    def norm(s: str) -> str:
-        s = _normalize_ticker(s)
-        # try to be forgiving for dot vs dash
-        return s.replace(".", "-")
-
-    wanted2 = norm(wanted)
 
+def _build_sec_index(sec_rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Map normalized ticker -> SEC record (first record wins, like the old linear scan).
+    """
+    index: dict[str, dict[str, Any]] = {}
     for rec in sec_rows:
         tk = rec.get("ticker")
         if not tk:
             continue
-        if norm(str(tk)) == wanted2:
-            return rec
-    return None
+        index.setdefault(_sec_index_key(str(tk)), rec)
+    return index
+
+
+def _sec_lookup_by_ticker(sec_index: dict[str, dict[str, Any]], ticker: str) -> dict[str, Any] | None:
+    return sec_index.get(_sec_index_key(ticker))
+
+
+# Company fields checked by validate_companies_json.
+_VALIDATED_FIELDS = frozenset({"ticker", "cik", "exchange", "earnings_call"})
 
 
 def validate_companies_json(data: dict) -> list[str]:
@@ -191,11 +235,11 @@ def validate_companies_json(data: dict) -> list[str]:
                     if k not in ec:
                         errors.append(f"companies[{i}].earnings_call.{k} is required when earnings_call is set")
                 q = ec.get("quarter")
-                if isinstance(q, str) and not re.fullmatch(r"q[1-4]", q):
+                if isinstance(q, str) and not _RE_QUARTER.fullmatch(q):
                     errors.append(f"companies[{i}].earnings_call.quarter must be q1..q4 (got {q!r})")
                 d = ec.get("date")
                 if d is not None:
-                    if not isinstance(d, str) or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", d):
+                    if not isinstance(d, str) or not _RE_DATE.fullmatch(d):
                         errors.append(f"companies[{i}].earnings_call.date must be YYYY-MM-DD or null (got {d!r})")
 
     return errors
@@ -212,12 +256,18 @@ def _save_companies_file(path: str, data: dict) -> None:
         f.write("\n")
 
 
-def _find_company_index(companies: list[dict], ticker: str) -> int | None:
-    wanted = _normalize_ticker(ticker)
-    for i, c in enumerate(companies):
-        if _normalize_ticker(c.get("ticker", "")) == wanted:
-            return i
-    return None
+def _enrich_ticker(
+    ticker: str,
+    sec_index: dict[str, dict[str, Any]],
+    user_agent: str,
+    need_date: bool,
+) -> tuple[str, dict[str, Any] | None, EarningsCallMeta | None]:
+    """
+    SEC + earningscall.biz lookups for one normalized ticker (no shared state mutated).
+    """
+    sec = _sec_lookup_by_ticker(sec_index, ticker)
+    ec = _discover_latest_earnings_call(ticker=ticker, user_agent=user_agent, need_date=need_date)
+    return ticker, sec, ec
 
 
 def add_or_update_by_tickers(
@@ -234,37 +284,61 @@ def add_or_update_by_tickers(
         raise SystemExit("companies.json validation failed:\n- " + "\n- ".join(errors))
 
     companies: list[dict] = data["companies"]
-    sec_rows = _load_sec_company_tickers(user_agent=user_agent)
+    sec_index = _build_sec_index(_load_sec_company_tickers(user_agent=user_agent))
+
+    idx_map: dict[str, int] = {}
+    for i, c in enumerate(companies):
+        idx_map.setdefault(_normalize_ticker(c.get("ticker", "")), i)
+
+    def needs_call_date(tk: str) -> bool:
+        # An existing earnings_call is only replaced with --update-existing, so the
+        # transcript page (for the call date) is not needed otherwise.
+        idx = idx_map.get(tk)
+        return update_existing or idx is None or not companies[idx].get("earnings_call")
+
+    # Enrichment is network-bound (up to ~9 requests per ticker), so fan it out;
+    # results are applied to `companies` on this thread to keep updates ordered.
+    norm_tickers = [_normalize_ticker(t) for t in tickers]
+    need_dates = [needs_call_date(tk) for tk in norm_tickers]
+    enriched: list[tuple[str, dict[str, Any] | None, EarningsCallMeta | None]] = []
+    if norm_tickers:
+        with ThreadPoolExecutor(max_workers=min(_MAX_ENRICH_WORKERS, len(norm_tickers))) as executor:
+            enriched = list(
+                executor.map(
+                    lambda tk, need_date: _enrich_ticker(tk, sec_index, user_agent, need_date),
+                    norm_tickers,
+                    need_dates,
+                )
+            )
 
-    changed = False
-    for t in tickers:
-        tk = _normalize_ticker(t)
-        idx = _find_company_index(companies, tk)
+    # Fields written this run; post-update validation is skipped if none of them are validated.
+    mutated_fields: set[str] = set()
+    for tk, sec, ec in enriched:
+        idx = idx_map.get(tk)
         if idx is None:
             companies.append({"ticker": tk})
             idx = len(companies) - 1
-            changed = True
+            idx_map[tk] = idx
+            mutated_fields.add("ticker")
 
         company = companies[idx]
 
         # SEC enrichment (name + cik)
-        sec = _sec_lookup_by_ticker(sec_rows, tk)
         if sec:
             if update_existing or not company.get("name"):
                 if sec.get("title"):
                     company["name"] = str(sec["title"])
-                    changed = True
+                    mutated_fields.add("name")
             if update_existing or not company.get("cik"):
                 if sec.get("cik_str") is not None:
                     company["cik"] = _cik_to_10_digits(sec["cik_str"])
-                    changed = True
+                    mutated_fields.add("cik")
 
         # EarningsCall enrichment (exchange + earnings_call meta)
-        ec = _discover_latest_earnings_call(ticker=tk, user_agent=user_agent)
         if ec:
             if update_existing or not company.get("exchange"):
                 company["exchange"] = ec.exchange
-                changed = True
+                mutated_fields.add("exchange")
             if update_existing or not company.get("earnings_call"):
                 company["earnings_call"] = {
                     "symbol": ec.symbol,
@@ -272,18 +346,19 @@ def add_or_update_by_tickers(
                     "quarter": ec.quarter,
                     "date": ec.call_date,
                 }
-                changed = True
+                mutated_fields.add("earnings_call")
 
     # Sort by ticker for readability
-    companies.sort(key=lambda c: _normalize_ticker(c.get("ticker", "")))
+    companies.sort(key=lambda c: c.get("ticker", "").strip().upper())
     data["companies"] = companies
 
     # Validate after modifications
-    errors2 = validate_companies_json(data)
-    if errors2:
-        raise SystemExit("post-update validation failed:\n- " + "\n- ".join(errors2))
+    if mutated_fields & _VALIDATED_FIELDS:
+        errors2 = validate_companies_json(data)
+        if errors2:
+            raise SystemExit("post-update validation failed:\n- " + "\n- ".join(errors2))
 
-    if changed and not dry_run:
+    if mutated_fields and not dry_run:
         _save_companies_file(companies_path, data)
 
     return 0
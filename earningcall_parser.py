@@ -1,11 +1,46 @@
 import argparse
-import json
-import html
+import functools
+import io
 import os
-import re
 import sys
-import urllib.request
 from html.parser import HTMLParser
+from typing import Callable
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _LexHTML  # type: ignore
+except ImportError:
+    _LexHTML = None
+
+from companies_updater import SEC_TICKERS_TTL_SECONDS, SEC_TICKERS_URL, TRANSCRIPT_TTL_SECONDS
+from http_cache import http_get_cached, http_get_text_cached, json_loads
+
+
+# Obvious site chrome and separator lines (compared lowercased).
+_CHROME_EXACT = frozenset(
+    {
+        "search",
+        "calendar",
+        "chatai",
+        "pricing",
+        "resources",
+        "about us",
+        "top employers",
+        "login",
+        "download app",
+        "download apps",
+        "designed by",
+        "company",
+        "quick link",
+        "resource",
+        "download",
+        "share",
+        "disclaimer",
+        "-",
+        "–",
+        "—",
+        "1.0x",
+    }
+)
 
 
 class _HtmlToText(HTMLParser):
@@ -41,8 +76,9 @@ class _HtmlToText(HTMLParser):
     _SKIP_TAGS = {"script", "style", "noscript"}
 
     def __init__(self) -> None:
-        super().__init__(convert_charrefs=False)
-        self._chunks: list[str] = []
+        # convert_charrefs=True: entity/char refs are unescaped inline and delivered via handle_data.
+        super().__init__(convert_charrefs=True)
+        self._buf = io.StringIO()
         self._skip_depth = 0
 
     def handle_starttag(self, tag: str, attrs) -> None:
@@ -52,7 +88,7 @@ class _HtmlToText(HTMLParser):
         if self._skip_depth:
             return
         if tag in self._BLOCK_TAGS:
-            self._chunks.append("\n")
+            self._buf.write("\n")
 
     def handle_endtag(self, tag: str) -> None:
         if tag in self._SKIP_TAGS:
@@ -61,59 +97,76 @@ class _HtmlToText(HTMLParser):
         if self._skip_depth:
             return
         if tag in self._BLOCK_TAGS:
-            self._chunks.append("\n")
+            self._buf.write("\n")
 
     def handle_data(self, data: str) -> None:
         if self._skip_depth:
             return
         if data:
-            self._chunks.append(data)
+            self._buf.write(data)
 
-    def handle_entityref(self, name: str) -> None:
-        if self._skip_depth:
-            return
-        self._chunks.append(f"&{name};")
+    def text(self) -> str:
+        return self._buf.getvalue()
 
-    def handle_charref(self, name: str) -> None:
-        if self._skip_depth:
-            return
-        self._chunks.append(f"&#{name};")
 
-    def text(self) -> str:
-        return "".join(self._chunks)
+_LEX_BLOCK_SELECTOR = ",".join(sorted(_HtmlToText._BLOCK_TAGS))
+
+
+def html_to_text(html_doc: str) -> str:
+    """
+    Strip tags from an HTML page, keeping rough line structure.
+
+    Uses selectolax (C, lexbor) when installed; falls back to the stdlib-based _HtmlToText.
+    Both break lines only around _HtmlToText._BLOCK_TAGS, so inline tags stay on one line.
+    """
+    if _LexHTML is not None:
+        tree = _LexHTML(html_doc)
+        tree.strip_tags(sorted(_HtmlToText._SKIP_TAGS))
+        if tree.body is not None:
+            for node in tree.body.css(_LEX_BLOCK_SELECTOR):
+                node.insert_before("\n")
+                node.insert_after("\n")
+            return tree.body.text(separator="")
+
+    parser = _HtmlToText()
+    parser.feed(html_doc)
+    parser.close()
+    return parser.text()
 
 
 def _normalize_ticker(ticker: str) -> str:
     return str(ticker).strip().upper()
 
 
-def _http_get_json(url: str, *, user_agent: str) -> dict:
-    req = urllib.request.Request(
-        url,
-        headers={"User-Agent": user_agent, "Accept": "application/json,*/*"},
-        method="GET",
-    )
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read()
-        charset = resp.headers.get_content_charset() or "utf-8"
-    return json.loads(raw.decode(charset, errors="replace"))
+def _http_get_json(url: str, *, user_agent: str, ttl_seconds: float = 0) -> dict:
+    raw, _ = http_get_cached(url, user_agent=user_agent, ttl_seconds=ttl_seconds, accept="application/json,*/*")
+    return json_loads(raw)
 
 
-def _sec_cik_for_ticker(sec_company_tickers: dict, ticker: str) -> int | None:
-    wanted = _normalize_ticker(ticker).replace(".", "-")
+def _sec_cik_index(sec_company_tickers: dict) -> dict[str, dict]:
+    """
+    Map normalized ticker (dot -> dash) -> SEC record, keeping the first match.
+    """
+    index: dict[str, dict] = {}
     for rec in sec_company_tickers.values():
         if not isinstance(rec, dict):
             continue
         tk = rec.get("ticker")
         if not tk:
             continue
-        if _normalize_ticker(str(tk)).replace(".", "-") == wanted:
-            cik = rec.get("cik_str")
-            try:
-                return int(cik)
-            except Exception:
-                return None
-    return None
+        index.setdefault(_normalize_ticker(str(tk)).replace(".", "-"), rec)
+    return index
+
+
+def _sec_cik_for_ticker(sec_index: dict[str, dict], ticker: str) -> int | None:
+    rec = sec_index.get(_normalize_ticker(ticker).replace(".", "-"))
+    if rec is None:
+        return None
+    cik = rec.get("cik_str")
+    try:
+        return int(cik)
+    except Exception:
+        return None
 
 
 def _normalize_quarter(quarter: int | str) -> str:
@@ -137,101 +190,77 @@ def _build_url(exchange: str, ticker: str, year: int, quarter: int | str) -> str
     return f"https://earningscall.biz/e/{ex}/s/{tk}/y/{y}/q/{q}"
 
 
-def _fetch_html(url: str) -> str:
-    req = urllib.request.Request(
+def _fetch_html(url: str, *, cacheable: Callable[[str], bool] | None = None) -> str:
+    return http_get_text_cached(
         url,
-        headers={
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) earningscall-parser/1.0",
-            "Accept": "text/html,*/*",
-        },
-        method="GET",
+        user_agent="Mozilla/5.0 (X11; Linux x86_64) earningscall-parser/1.0",
+        ttl_seconds=TRANSCRIPT_TTL_SECONDS,
+        accept="text/html,*/*",
+        cacheable=cacheable,
     )
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        raw = resp.read()
-        charset = resp.headers.get_content_charset() or "utf-8"
-    return raw.decode(charset, errors="replace")
 
 
-def _clean_transcript_text(text: str) -> str:
-    s = html.unescape(text)
-    s = s.replace("\r\n", "\n").replace("\r", "\n")
-
-    # Normalize whitespace but keep paragraph breaks.
-    s = re.sub(r"[ \t\f\v]+", " ", s)
-    s = re.sub(r"\n[ \t]+", "\n", s)
-    s = re.sub(r"\n{3,}", "\n\n", s).strip()
+def _is_noise_line(ln: str, low: str) -> bool:
+    # `low` is ln.lower(), computed once by the caller.
+    if not ln:
+        return True
+    if low.startswith("earningscall ·"):
+        return True
+    if low in _CHROME_EXACT:
+        return True
+    if ln.startswith("©"):
+        return True
+    return False
 
-    lines = [ln.strip() for ln in s.split("\n")]
 
-    # Drop empty lines and obvious chrome lines.
-    chrome_exact = {
-        "search",
-        "calendar",
-        "chatai",
-        "pricing",
-        "resources",
-        "about us",
-        "top employers",
-        "login",
-        "download app",
-        "download apps",
-        "designed by",
-        "company",
-        "quick link",
-        "resource",
-        "download",
-        "share",
-        "disclaimer",
-    }
+def _clean_transcript_text(text: str) -> str:
+    # `text` comes from html_to_text, whose parsers already decode entity/char refs;
+    # unescaping again would only rescan the transcript (and double-decode "&amp;lt;").
 
-    def is_noise(ln: str) -> bool:
-        if not ln:
-            return True
-        low = ln.lower()
-        if low.startswith("earningscall ·"):
-            return True
-        if low in chrome_exact:
-            return True
-        if low in {"-", "–", "—", "1.0x"}:
-            return True
-        if re.fullmatch(r"©.*", ln):
-            return True
-        return False
-
-    # Keep everything, but trim top chrome.
-    cleaned: list[str] = []
+    # Single pass over lines: normalize whitespace, trim top chrome, prefer
+    # starting at "Operator", stop at "Disclaimer" and drop extra blank runs.
+    out_lines: list[str] = []
     started = False
-    for ln in lines:
+    saw_operator = False
+    stopped = False
+    last_blank = False
+    for raw in text.splitlines():
+        ln = " ".join(raw.split())
+        low = ln.lower()
+
+        # Prefer starting at "Operator" if present (even past a Disclaimer).
+        if low == "operator" and not saw_operator:
+            out_lines = [ln]
+            started = saw_operator = True
+            stopped = last_blank = False
+            continue
+        if stopped:
+            continue
+
         if not started:
-            if is_noise(ln):
+            if _is_noise_line(ln, low):
                 continue
             # Most transcripts start at "Operator". If not, we still start at first non-noise.
             started = True
-        cleaned.append(ln)
 
-    # Prefer starting at "Operator" if present.
-    for i, ln in enumerate(cleaned):
-        if ln.lower() == "operator":
-            cleaned = cleaned[i:]
-            break
-
-    # Stop at Disclaimer if present (keep transcript above it).
-    for i, ln in enumerate(cleaned):
-        if ln.lower() == "disclaimer":
-            cleaned = cleaned[:i]
-            break
+        # Stop at Disclaimer if present (keep transcript above it).
+        if low == "disclaimer":
+            if saw_operator:
+                break
+            stopped = True
+            continue
 
-    # Final pass: remove extra blank runs.
-    out_lines: list[str] = []
-    last_blank = False
-    for ln in cleaned:
         blank = not ln
         if blank and last_blank:
             continue
         out_lines.append(ln)
         last_blank = blank
 
-    return "\n".join(out_lines).strip() + "\n"
+    # Lines are already stripped and never start blank, so only a trailing blank can remain;
+    # drop it instead of strip()-copying the joined transcript.
+    if out_lines and not out_lines[-1]:
+        out_lines.pop()
+    return "\n".join(out_lines) + "\n"
 
 
 def parse_earningscall_transcript(exchange: str, ticker: str, year: int, quarter: int | str) -> str:
@@ -241,11 +270,16 @@ def parse_earningscall_transcript(exchange: str, ticker: str, year: int, quarter
     Returns a single cleaned text string including Q&A (if present).
     """
     url = _build_url(exchange=exchange, ticker=ticker, year=year, quarter=quarter)
-    html_doc = _fetch_html(url)
-    parser = _HtmlToText()
-    parser.feed(html_doc)
-    parser.close()
-    return _clean_transcript_text(parser.text())
+    transcript = ""
+
+    def has_transcript(page: str) -> bool:
+        # A page fetched before the transcript is published must not be cached for TRANSCRIPT_TTL_SECONDS.
+        nonlocal transcript
+        transcript = _clean_transcript_text(html_to_text(page))
+        return bool(transcript.strip())
+
+    html_doc = _fetch_html(url, cacheable=has_transcript)
+    return transcript or _clean_transcript_text(html_to_text(html_doc))
 
 
 def parse_company_earningscall_transcript(company: dict) -> str:
@@ -271,38 +305,24 @@ def parse_company_earningscall_transcript(company: dict) -> str:
     return parse_earningscall_transcript(exchange=exchange, ticker=symbol, year=year, quarter=quarter)
 
 
-def get_latest_10q_info(ticker: str, sec_identity: str) -> dict:
-    """
-    Simple SEC 10-Q metadata lookup (no API key, stdlib-only).
-
-    Fetches:
-    - SEC ticker->CIK mapping
-    - SEC company submissions JSON
-
-    Returns a dict with keys:
-      - ticker
-      - cik (10-digit string)
-      - company_name
-      - period_of_report (reportDate)
-      - filing_date
-      - accession_number
-      - primary_document
-      - filing_index_url
-      - primary_document_url
-    """
+def _sec_user_agent(sec_identity: str) -> str:
     if not sec_identity:
         raise ValueError("sec_identity is required (SEC requires a descriptive User-Agent/contact)")
+    return f"finance-podcast-bot ({sec_identity})"
 
-    user_agent = f"finance-podcast-bot ({sec_identity})"
 
-    # 1) Ticker -> CIK (SEC-maintained mapping)
-    tickers_json = _http_get_json("https://www.sec.gov/files/company_tickers.json", user_agent=user_agent)
-    cik_int = _sec_cik_for_ticker(tickers_json, ticker)
-    if cik_int is None:
-        raise ValueError(f"Ticker not found in SEC mapping: {ticker}")
-    cik10 = str(int(cik_int)).zfill(10)
+def _load_sec_cik_index(*, user_agent: str) -> dict[str, dict]:
+    """
+    SEC-maintained ticker->CIK mapping, indexed by normalized ticker.
+    """
+    tickers_json = _http_get_json(SEC_TICKERS_URL, user_agent=user_agent, ttl_seconds=SEC_TICKERS_TTL_SECONDS)
+    return _sec_cik_index(tickers_json)
 
-    # 2) Company submissions -> latest 10-Q
+
+def _latest_10q_for_cik(cik10: str, *, ticker: str, user_agent: str) -> dict:
+    """
+    Latest 10-Q metadata from the company submissions JSON (one request, no ticker mapping).
+    """
     submissions = _http_get_json(f"https://data.sec.gov/submissions/CIK{cik10}.json", user_agent=user_agent)
     company_name = submissions.get("name")
     recent = (submissions.get("filings") or {}).get("recent") or {}
@@ -316,13 +336,10 @@ def get_latest_10q_info(ticker: str, sec_identity: str) -> dict:
     if not (isinstance(forms, list) and isinstance(accession, list) and isinstance(filing_date, list)):
         raise ValueError("Unexpected SEC submissions JSON shape (recent arrays missing)")
 
-    idx = None
-    for i, f in enumerate(forms):
-        if f == "10-Q":
-            idx = i
-            break
-    if idx is None:
-        raise ValueError(f"No 10-Q found in recent filings for {ticker}")
+    try:
+        idx = forms.index("10-Q")
+    except ValueError:
+        raise ValueError(f"No 10-Q found in recent filings for {ticker}") from None
 
     acc = accession[idx]
     acc_nodash = str(acc).replace("-", "")
@@ -343,6 +360,39 @@ def get_latest_10q_info(ticker: str, sec_identity: str) -> dict:
     return info
 
 
+def get_latest_10q_info(ticker: str, sec_identity: str, *, sec_index: dict[str, dict] | None = None) -> dict:
+    """
+    Simple SEC 10-Q metadata lookup (no API key; uses the shared http_cache client).
+
+    Fetches:
+    - SEC ticker->CIK mapping (skipped if a prebuilt sec_index is passed)
+    - SEC company submissions JSON
+
+    Returns a dict with keys:
+      - ticker
+      - cik (10-digit string)
+      - company_name
+      - period_of_report (reportDate)
+      - filing_date
+      - accession_number
+      - primary_document
+      - filing_index_url
+      - primary_document_url
+    """
+    user_agent = _sec_user_agent(sec_identity)
+
+    # 1) Ticker -> CIK (SEC-maintained mapping)
+    if sec_index is None:
+        sec_index = _load_sec_cik_index(user_agent=user_agent)
+    cik_int = _sec_cik_for_ticker(sec_index, ticker)
+    if cik_int is None:
+        raise ValueError(f"Ticker not found in SEC mapping: {ticker}")
+    cik10 = str(int(cik_int)).zfill(10)
+
+    # 2) Company submissions -> latest 10-Q
+    return _latest_10q_for_cik(cik10, ticker=ticker, user_agent=user_agent)
+
+
 def compare_latest_10q_across_companies(
     tickers: list[str],
     sec_identity: str,
@@ -350,10 +400,16 @@ def compare_latest_10q_across_companies(
     """
     Compare latest 10-Q metadata across companies.
     """
+    # Load the ticker->CIK mapping once for all tickers.
+    try:
+        sec_index = _load_sec_cik_index(user_agent=_sec_user_agent(sec_identity))
+    except Exception as e:
+        return [{"ticker": t, "error": str(e)} for t in tickers]
+
     out: list[dict] = []
     for t in tickers:
         try:
-            info = get_latest_10q_info(t, sec_identity)
+            info = get_latest_10q_info(t, sec_identity, sec_index=sec_index)
             out.append(
                 {
                     "ticker": t,
@@ -369,9 +425,21 @@ def compare_latest_10q_across_companies(
     return out
 
 
+@functools.lru_cache(maxsize=8)
+def _load_companies_json_cached(path: str, mtime_ns: int) -> dict:
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
+
+def _load_companies_json(path: str) -> dict:
+    """
+    Parse companies.json once per (path, mtime); later calls reuse the parsed object (treat as read-only).
+    """
+    return _load_companies_json_cached(path, os.stat(path).st_mtime_ns)
+
+
 def _ticker_from_companies_json(path: str, company_index: int) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _load_companies_json(path)
     companies = data["companies"]
     if not isinstance(companies, list) or not companies:
         raise ValueError(f"{path} has no companies list")
@@ -384,8 +452,7 @@ def _ticker_from_companies_json(path: str, company_index: int) -> str:
 
 
 def _company_from_companies_json(path: str, company_index: int) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = _load_companies_json(path)
     companies = data["companies"]
     if not isinstance(companies, list) or not companies:
         raise ValueError(f"{path} has no companies list")
@@ -437,13 +504,13 @@ def _main() -> int:
         args.sec_identity = os.environ.get("SEC_IDENTITY", "my@email.com")
 
     if args.all_companies:
-        with open(args.companies_json, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_companies_json(args.companies_json)
         companies = data.get("companies") or []
         if not isinstance(companies, list) or not companies:
             ap.error("companies.json has no companies list")
 
         interactive = sys.stdin.isatty()
+        sec_index: dict[str, dict] | None = None
         for company in companies:
             ticker = (company.get("ticker") or "").strip()
             if not company.get("earnings_call"):
@@ -451,7 +518,10 @@ def _main() -> int:
 
             if args.with_10q:
                 try:
-                    info = get_latest_10q_info(ticker, sec_identity=args.sec_identity)
+                    # Load the SEC ticker->CIK mapping once for the whole run.
+                    if sec_index is None:
+                        sec_index = _load_sec_cik_index(user_agent=_sec_user_agent(args.sec_identity))
+                    info = get_latest_10q_info(ticker, sec_identity=args.sec_identity, sec_index=sec_index)
                     print(
                         f"[10-Q] {ticker} "
                         f"period={info.get('period_of_report')} filed={info.get('filing_date')} "
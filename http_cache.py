@@ -0,0 +1,134 @@
+import hashlib
+import json
+import pathlib
+import time
+from typing import Callable
+
+import urllib3
+
+try:
+    import orjson  # type: ignore
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+# On-disk HTTP cache, keyed by URL (see http_get_cached).
+HTTP_CACHE_DIR = pathlib.Path(".cache/http")
+
+
+# Shared keep-alive pool: SEC and earningscall.biz calls reuse TCP/TLS connections.
+_POOL = urllib3.PoolManager(
+    num_pools=8,
+    maxsize=16,
+    retries=urllib3.Retry(3, backoff_factor=0.3),
+)
+
+
+def _content_charset(content_type: str | None) -> str | None:
+    for part in (content_type or "").split(";")[1:]:
+        key, _, value = part.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"')
+    return None
+
+
+def http_get(url: str, *, user_agent: str, accept: str) -> tuple[bytes, str]:
+    resp = _POOL.request(
+        "GET",
+        url,
+        headers={
+            "User-Agent": user_agent,
+            "Accept": accept,
+        },
+        timeout=30,
+    )
+    if resp.status >= 400:
+        raise urllib3.exceptions.HTTPError(f"GET {url} failed: HTTP {resp.status}")
+    charset = _content_charset(resp.headers.get("Content-Type")) or "utf-8"
+    return resp.data, charset
+
+
+def http_get_text(url: str, *, user_agent: str, accept: str = "application/json,text/html,*/*") -> str:
+    raw, charset = http_get(url, user_agent=user_agent, accept=accept)
+    return raw.decode(charset, errors="replace")
+
+
+def _cache_paths(url: str) -> tuple[pathlib.Path, pathlib.Path]:
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return HTTP_CACHE_DIR / f"{key}.bin", HTTP_CACHE_DIR / f"{key}.meta.json"
+
+
+def _read_cached(url: str, ttl_seconds: float) -> tuple[bytes, str] | None:
+    body_path, meta_path = _cache_paths(url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if time.time() - float(meta["fetched_at"]) < ttl_seconds:
+            return body_path.read_bytes(), meta.get("charset") or "utf-8"
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_cached(url: str, raw: bytes, charset: str) -> None:
+    body_path, meta_path = _cache_paths(url)
+    try:
+        HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(raw)
+        meta_path.write_text(
+            json.dumps({"url": url, "fetched_at": time.time(), "charset": charset}) + "\n",
+            encoding="utf-8",
+        )
+    except OSError:
+        pass
+
+
+def http_get_cached(
+    url: str,
+    *,
+    user_agent: str,
+    ttl_seconds: float,
+    accept: str = "application/json,text/html,*/*",
+) -> tuple[bytes, str]:
+    """
+    Like http_get, but served from an on-disk cache (keyed by URL) while younger than ttl_seconds.
+    ttl_seconds <= 0 skips the cache entirely.
+    """
+    if ttl_seconds <= 0:
+        return http_get(url, user_agent=user_agent, accept=accept)
+
+    hit = _read_cached(url, ttl_seconds)
+    if hit is not None:
+        return hit
+
+    raw, charset = http_get(url, user_agent=user_agent, accept=accept)
+    _write_cached(url, raw, charset)
+    return raw, charset
+
+
+def http_get_text_cached(
+    url: str,
+    *,
+    user_agent: str,
+    ttl_seconds: float,
+    accept: str = "application/json,text/html,*/*",
+    cacheable: Callable[[str], bool] | None = None,
+) -> str:
+    """
+    Text variant of http_get_cached. When `cacheable` is given, a fresh response is only
+    stored if cacheable(text) is true (e.g. a page that is not complete yet is refetched next time).
+    """
+    if ttl_seconds <= 0:
+        return http_get_text(url, user_agent=user_agent, accept=accept)
+
+    hit = _read_cached(url, ttl_seconds)
+    if hit is not None:
+        raw, charset = hit
+        return raw.decode(charset, errors="replace")
+
+    raw, charset = http_get(url, user_agent=user_agent, accept=accept)
+    text = raw.decode(charset, errors="replace")
+    if cacheable is None or cacheable(text):
+        _write_cached(url, raw, charset)
+    return text
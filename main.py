@@ -1,9 +1,18 @@
+import functools
+import hashlib
 import json
+import pathlib
 import requests
 import os
+import queue
+import re
+import threading
+import time
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from companies_updater import add_or_update_by_tickers
+from http_cache import json_loads
 
 # ---------- Gemini model (hard-coded) ----------
 # Pick ONE model and set it to GEMINI_MODEL.
@@ -15,6 +24,9 @@ GEMINI_MODEL = "gemini-2.5-flash"
 
 COMPANIES_PATH = "companies.json"
 
+# Companies processed concurrently (bounded by SEC rate limits).
+PIPELINE_WORKERS = 4
+
 
 def _is_truthy_env(name: str) -> bool:
     return os.environ.get(name, "").strip() in {"1", "true", "TRUE", "yes", "YES"}
@@ -50,9 +62,17 @@ def _reported_within_last_24h(company: dict, *, now: dt.datetime) -> bool:
     return report_date >= threshold_date
 
 
+@functools.lru_cache(maxsize=4)
+def _load_companies_data_cached(path: str, mtime_ns: int) -> dict:
+    return json_loads(pathlib.Path(path).read_bytes())
+
+
 def load_companies_data(path: str = COMPANIES_PATH) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """
+    Parsed companies.json, memoized per (path, mtime) so repeat reads skip the parse.
+    The returned dict is shared between callers; treat it as read-only.
+    """
+    return _load_companies_data_cached(path, os.stat(path).st_mtime_ns)
 
 
 def save_companies_data(data: dict, path: str = COMPANIES_PATH) -> None:
@@ -86,7 +106,7 @@ def refresh_companies_json(path: str = COMPANIES_PATH) -> None:
         print(f"[WARN] Could not refresh {path}: {e}")
 
 def get_company_source_text(company: dict) -> str:
-    # Prefer earnings-call transcript; fallback to SEC JSON snippet if missing.
+    # Prefer earnings-call transcript; fallback to the latest SEC filing if missing.
     try:
         from earningcall_parser import parse_company_earningscall_transcript
         return parse_company_earningscall_transcript(company)
@@ -94,26 +114,224 @@ def get_company_source_text(company: dict) -> str:
         return get_latest_report(company["cik"])
 
 # ---------- SEC fetch ----------
+SEC_CACHE_DIR = pathlib.Path(".cache/sec")
+
+# One keep-alive session for all SEC requests (requests already asks for gzip by default).
+_SEC = requests.Session()
+_SEC.headers.update({"User-Agent": "finance-bot your@email.com"})
+_SEC.mount("https://", requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+
+SEC_REPORT_MAX_CHARS = 4000  # חותך למניעת עומס
+# Periodic reports preferred over whatever was filed last (Form 4s, etc.).
+_SEC_REPORT_FORMS = ("10-Q", "10-K")
+# Inline XBRL filings open with a hidden <ix:header> full of xbrli contexts; it has no readable text.
+_RE_IX_HEADER = re.compile(r"<ix:header\b.*?</ix:header\s*>", re.IGNORECASE | re.DOTALL)
+# MD&A is Item 2 of a 10-Q and Item 7 of a 10-K.
+_RE_MDNA_HEADING = re.compile(
+    r"\bItem\s+[27]\s*[.:]?\s*Management[’']s\s+Discussion\s+and\s+Analysis", re.IGNORECASE
+)
+_RE_ITEM_HEADING = re.compile(r"\bItem\s+\d+[A-Z]?\s*[.:]", re.IGNORECASE)
+
+
+def _skip_to_mdna(doc_text: str) -> str:
+    """
+    Start the filing text at its MD&A section, past the cover page and table of contents.
+    A table-of-contents entry is recognised by the next "Item N." following right after it.
+    """
+    for m in _RE_MDNA_HEADING.finditer(doc_text):
+        if not _RE_ITEM_HEADING.search(doc_text, m.end(), m.end() + 300):
+            return doc_text[m.start():]
+    return doc_text
+
+
+def _latest_filing_text(cik: str, submissions: dict) -> str:
+    """
+    Compact text of the company's latest periodic filing: a one-line header plus the
+    start of its primary document's MD&A, instead of raw submissions JSON.
+    """
+    from earningcall_parser import html_to_text
+
+    recent = (submissions.get("filings") or {}).get("recent") or {}
+    forms = recent.get("form") or []
+    idx = next((i for i, f in enumerate(forms) if f in _SEC_REPORT_FORMS), 0)
+    form = forms[idx]
+    filing_date = recent["filingDate"][idx]
+    accession = str(recent["accessionNumber"][idx]).replace("-", "")
+    primary = recent["primaryDocument"][idx]
+
+    doc_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{primary}"
+    r = _SEC.get(doc_url, timeout=30)
+    r.raise_for_status()
+    doc_text = _skip_to_mdna(" ".join(html_to_text(_RE_IX_HEADER.sub("", r.text)).split()))
+
+    header = f"{submissions.get('name') or ''} — {form} filed {filing_date}\n"
+    return (header + doc_text)[:SEC_REPORT_MAX_CHARS]
+
+
+@functools.lru_cache(maxsize=None)
 def get_latest_report(cik):
+    """
+    Text of the latest SEC filing for `cik` (see _latest_filing_text).
+
+    Conditional GET against SEC: the last result is kept in .cache/sec/<cik>.json with the
+    submissions ETag/Last-Modified, so an unchanged submissions file comes back as a 304.
+    """
     url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-    headers = {"User-Agent": "finance-bot your@email.com"}
-    r = requests.get(url, headers=headers)
-    return r.text[:4000]  # חותך למניעת עומס
+    headers: dict[str, str] = {}
+    cache_path = SEC_CACHE_DIR / f"{cik}.json"
+
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = None
+    if isinstance(cached, dict) and cached.get("kind") == "filing_text" and isinstance(cached.get("body"), str):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    else:
+        cached = None
+
+    r = _SEC.get(url, headers=headers, timeout=10)
+    if r.status_code == 304 and cached is not None:
+        return cached["body"]
+
+    if r.status_code != 200:
+        return r.text[:SEC_REPORT_MAX_CHARS]
+
+    try:
+        body = _latest_filing_text(cik, r.json())
+    except Exception as e:
+        print(f"[WARN] Could not extract latest filing for CIK {cik}: {e}")
+        return r.text[:SEC_REPORT_MAX_CHARS]
+
+    try:
+        SEC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "kind": "filing_text",
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "body": body,
+                },
+                ensure_ascii=False,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+    except OSError:
+        pass
+    return body
 
 # ---------- Gemini summary ----------
-def summarize(client: Any, model: str, text: str, company: str, mock: bool) -> str:
-    if mock:
-      return """ברוכים הבאים לפודקאסט של תותי כאן העתיד הוא העבר והעבר הוא כבר ממש מיושן! הכל תודות לגברת ביבי של כוחותיה והצלחותיה בהריון המטורף שהיא עוברת
+# Static part of the prompt; sent as the system instruction so every request shares the same
+# prefix, which Gemini's implicit caching reuses. (It is far below the minimum size for an
+# explicit context cache.)
+SUMMARY_INSTRUCTION = "תסכם כפודקאסט פיננסי בעברית באורך 3 דקות."
+GEMINI_CACHE_DIR = pathlib.Path(".cache/gemini")
+
+
+MOCK_SCRIPT = """ברוכים הבאים לפודקאסט של תותי כאן העתיד הוא העבר והעבר הוא כבר ממש מיושן! הכל תודות לגברת ביבי של כוחותיה והצלחותיה בהריון המטורף שהיא עוברת
 """
-    else:
-      prompt = f"""
-    תסכם כפודקאסט פיננסי בעברית באורך 3 דקות.
-    החברה: {company}
-    טקסט:
-    {text}
+
+_SCRIPTS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "company": {"type": "STRING"},
+            "script": {"type": "STRING"},
+        },
+        "required": ["company", "script"],
+    },
+}
+
+
+def _summarize_batch(client: Any, model: str, entries: list[tuple[str, str]]) -> dict[str, str]:
+    """
+    Summarize several companies in one Gemini request.
+
+    `entries` is a list of (company name, source text); returns {company name: script}.
+    Companies missing from the batched answer are retried one by one.
     """
-      response = client.models.generate_content(model=model, contents=prompt)
-      return response.text or ""
+    if not entries:
+        return {}
+
+    parts = [
+        "Return a JSON array where each element has keys 'company' and 'script', one per entry below. "
+        "Use the company name exactly as given."
+    ]
+    for i, (company, text) in enumerate(entries, start=1):
+        parts.append(f"### {i}\nהחברה: {company}\nטקסט:\n{text}\n")
+    response = client.models.generate_content(
+        model=model,
+        contents="\n".join(parts),
+        config={
+            "system_instruction": SUMMARY_INSTRUCTION,
+            "response_mime_type": "application/json",
+            "response_schema": _SCRIPTS_SCHEMA,
+        },
+    )
+
+    try:
+        items = json.loads(response.text or "[]")
+    except ValueError:
+        items = []
+    scripts: dict[str, str] = {}
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and isinstance(item.get("company"), str) and isinstance(item.get("script"), str):
+            scripts[item["company"]] = item["script"]
+
+    missing = [(company, text) for company, text in entries if company not in scripts]
+    if missing and len(entries) > 1:
+        print(f"[WARN] Batched summary missed {len(missing)} companies; retrying individually")
+        for company, text in missing:
+            scripts.update(_summarize_batch(client, model, [(company, text)]))
+    return scripts
+
+
+def _script_cache_path(model: str, company: str, text: str) -> pathlib.Path:
+    # Exact-match key over everything that shapes the answer; not security-sensitive, so blake2b.
+    h = hashlib.blake2b(digest_size=16)
+    for part in (model, SUMMARY_INSTRUCTION, company, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return GEMINI_CACHE_DIR / f"{h.hexdigest()}.txt"
+
+
+def summarize(client: Any, model: str, entries: list[tuple[str, str]], mock: bool) -> dict[str, str]:
+    """
+    {company name: script} for (company name, source text) entries.
+
+    Scripts are memoized on disk under .cache/gemini, so re-runs on unchanged inputs
+    (e.g. after fixing a downstream TTS/ffmpeg/upload problem) skip Gemini entirely;
+    only the misses go into the batched request.
+    """
+    if mock:
+        return {company: MOCK_SCRIPT for company, _ in entries}
+
+    scripts: dict[str, str] = {}
+    misses: list[tuple[str, str]] = []
+    for company, text in entries:
+        try:
+            scripts[company] = _script_cache_path(model, company, text).read_text(encoding="utf-8")
+        except OSError:
+            misses.append((company, text))
+
+    fresh = _summarize_batch(client, model, misses)
+    for company, text in misses:
+        script = fresh.get(company)
+        if not script:
+            continue
+        scripts[company] = script
+        try:
+            GEMINI_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            _script_cache_path(model, company, text).write_text(script, encoding="utf-8")
+        except OSError:
+            pass
+    return scripts
 
 # ---------- YouTube ----------
 def get_youtube_service():
@@ -131,15 +349,21 @@ def get_youtube_service():
     )
 
     # יוצר Access Token חדש בכל ריצה
+    # Called once per run; the authorized http refreshes the token itself on expiry / 401.
     creds.refresh(Request())
 
-    return build("youtube", "v3", credentials=creds)
+    # static_discovery: use the discovery document bundled with the client instead of fetching it.
+    return build("youtube", "v3", credentials=creds, static_discovery=True)
 
 
-def upload_video(file_path, title):
-    from googleapiclient.http import MediaFileUpload
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_RETRIES = 5
+_RETRIABLE_UPLOAD_STATUSES = {500, 502, 503, 504}
+
 
-    youtube = get_youtube_service()
+def upload_video(youtube, file_path, title):
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
 
     request = youtube.videos().insert(
         part="snippet,status",
@@ -153,14 +377,94 @@ def upload_video(file_path, title):
                 "privacyStatus": "public"
             }
         },
-        media_body=MediaFileUpload(file_path)
+        media_body=MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
     )
 
-    response = request.execute()
+    # Resumable upload: a transient 5xx retries the current chunk, not the whole file.
+    response = None
+    retries = 0
+    while response is None:
+        try:
+            _, response = request.next_chunk()
+            retries = 0
+        except HttpError as e:
+            if e.resp.status not in _RETRIABLE_UPLOAD_STATUSES or retries >= UPLOAD_MAX_RETRIES:
+                raise
+            retries += 1
+            time.sleep(2 ** retries)
+
     print("Uploaded video ID:", response["id"])
     return response["id"]
 
 
+def _upload_worker(youtube: Any, uploads: queue.Queue[tuple[str, str] | None], errors: list[str]) -> None:
+    """
+    Single consumer for finished videos (the YouTube http object is not thread-safe).
+    A None item stops the worker.
+    """
+    while True:
+        item = uploads.get()
+        try:
+            if item is None:
+                return
+            file_path, title = item
+            try:
+                upload_video(youtube, file_path, title)
+            except Exception as e:
+                print(f"[ERROR] Upload failed for {file_path}: {e}")
+                errors.append(f"{file_path}: {e}")
+        finally:
+            uploads.task_done()
+
+
+def _make_gemini_client() -> Any:
+    try:
+        from google import genai as _genai  # type: ignore
+    except Exception:
+        try:
+            import google.genai as _genai  # type: ignore
+        except Exception as e:
+            raise RuntimeError(
+                "Gemini SDK not available. Install `google-genai` to run summaries."
+            ) from e
+    return _genai.Client(api_key=os.environ["GEMINI_KEY"])
+
+
+def produce_episode(
+    company: dict,
+    script: str,
+    *,
+    uploads: queue.Queue[tuple[str, str] | None] | None = None,
+) -> None:
+    """
+    TTS -> video for one company's script; the finished video is queued for upload if `uploads` is set.
+    Uses per-company output paths so several companies can run at once.
+    """
+    from offline_hebrew_tts import synthesize_hebrew_audio
+    from get_earning_image import create_earnings_summary_image
+    from video_render import render_still_video
+
+    video_path = f"final_{company['ticker']}.mp4"
+    audio_path = synthesize_hebrew_audio(script)
+    image_path = create_earnings_summary_image(company, summary_text=script)
+    render_still_video(image_path, audio_path, video_path)
+    try:
+        os.remove(audio_path)
+    except OSError:
+        pass
+    try:
+        os.remove(image_path)
+    except OSError:
+        pass
+
+    if uploads is not None:
+        print(f"Queueing video for YouTube upload: {company['name']}")
+        title = f"סיכום דוח - {company['name']}"
+        uploads.put((video_path, title))
+
+    print(f"Finished processing company: {company['name']}")
+
+
 def main() -> None:
     mock = False
     client: Any | None = None
@@ -170,6 +474,7 @@ def main() -> None:
     companies: list[dict] = companies_data["companies"]
     now_il = _now_israel()
 
+    due: list[dict] = []
     for company in companies:
         if not _reported_within_last_24h(company, now=now_il):
             print(
@@ -177,51 +482,63 @@ def main() -> None:
                 f"(earnings_call.date={((company.get('earnings_call') or {}).get('date'))!r})"
             )
             continue
+        due.append(company)
+
+    if not due:
+        return
+    if not mock:
+        client = _make_gemini_client()
+    # Uploads run on a background thread (one authenticated YouTube service for the whole run),
+    # overlapping with the next companies' TTS/encode. The small queue bounds pending videos.
+    uploads: queue.Queue[tuple[str, str] | None] | None = None
+    upload_errors: list[str] = []
+    uploader: threading.Thread | None = None
+    if _is_truthy_env("UPLOAD_YOUTUBE"):
+        uploads = queue.Queue(maxsize=2)
+        uploader = threading.Thread(
+            target=_upload_worker,
+            args=(get_youtube_service(), uploads, upload_errors),
+            name="youtube-uploader",
+        )
+        uploader.start()
 
-        if client is None and not mock:
-            try:
-                from google import genai as _genai  # type: ignore
-            except Exception:
-                try:
-                    import google.genai as _genai  # type: ignore
-                except Exception as e:
-                    raise RuntimeError(
-                        "Gemini SDK not available. Install `google-genai` to run summaries."
-                    ) from e
-            client = _genai.Client(api_key=os.environ["GEMINI_KEY"])
-
-        print(f"Processing company: {company['name']}")
-        source_text = get_company_source_text(company)
-        print(f"Source text: {source_text}")
-        script = summarize(client, GEMINI_MODEL, source_text, company["name"], mock=mock)
-        print(f"Summary script: {script}")
-
-        from offline_hebrew_tts import synthesize_hebrew_audio
-        from get_earning_image import create_earnings_summary_image
-        from moviepy import AudioFileClip, ImageClip
-
-        audio_path = synthesize_hebrew_audio(script)
-        audio = AudioFileClip(audio_path)
-        image_path = create_earnings_summary_image(company, summary_text=script)
-        image = ImageClip(image_path).with_duration(audio.duration)
-        video = image.with_audio(audio)
-        video.write_videofile("final.mp4", fps=24)
-        audio.close()
-        try:
-            os.remove(audio_path)
-        except OSError:
-            pass
-        try:
-            os.remove(image_path)
-        except OSError:
-            pass
+    # Each stage is mostly waiting on network (SEC, YouTube) or on ffmpeg/ONNX, so run a
+    # few companies side by side; the cap keeps SEC quotas in check.
+    # The uploader is stopped only after the pool has exited, i.e. once every producer is
+    # done queueing; stopping it earlier would leave late put()s blocked on a full queue.
+    try:
+        with ThreadPoolExecutor(max_workers=min(PIPELINE_WORKERS, len(due))) as executor:
+            print(f"Processing companies: {', '.join(c['name'] for c in due)}")
+            source_texts = list(executor.map(get_company_source_text, due))
+            for company, source_text in zip(due, source_texts):
+                print(f"Source text ({company['name']}): {source_text}")
+
+            # One Gemini request for all companies.
+            scripts = summarize(
+                client,
+                GEMINI_MODEL,
+                [(company["name"], source_text) for company, source_text in zip(due, source_texts)],
+                mock=mock,
+            )
 
-        if _is_truthy_env("UPLOAD_YOUTUBE"):
-            print(f"Uploading video to YouTube: {company['name']}")
-            title = f"סיכום דוח - {company['name']}"
-            upload_video("final.mp4", title)
-        
-        print(f"Finished processing company: {company['name']}")
+            ready: list[tuple[dict, str]] = []
+            for company in due:
+                script = scripts.get(company["name"])
+                if not script:
+                    print(f"[WARN] No summary script for {company['name']}; skipping")
+                    continue
+                print(f"Summary script ({company['name']}): {script}")
+                ready.append((company, script))
+
+            for _ in executor.map(lambda cs: produce_episode(cs[0], cs[1], uploads=uploads), ready):
+                pass
+    finally:
+        if uploads is not None and uploader is not None:
+            uploads.put(None)
+            uploader.join()
+
+    if upload_errors:
+        raise RuntimeError("YouTube upload failed:\n- " + "\n- ".join(upload_errors))
 
 
 if __name__ == "__main__":
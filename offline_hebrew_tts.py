@@ -1,7 +1,9 @@
+import functools
 import json
 import os
 import pathlib
 import tempfile
+import threading
 from dataclasses import dataclass
 from typing import Any
 
@@ -31,6 +33,9 @@ class OfflineHebrewTTSConfig:
     default_length_scale: float = 1.25
 
 
+_SETUP_LOCK = threading.Lock()
+
+
 def _ensure_dir(path: pathlib.Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
@@ -134,18 +139,66 @@ def _download_models(cfg: OfflineHebrewTTSConfig) -> tuple[pathlib.Path | None,
     return g2p_dir, voice_model_path, voice_config_path
 
 
-def _hebrew_to_phonemes(text: str, g2p_dir: pathlib.Path) -> str:
+_MODEL_LOAD_LOCK = threading.Lock()
+
+
+def _load_once(maxsize: int) -> Any:
     """
-    Hebrew -> IPA phonemes, using the community ONNX model (optimum-onnx + transformers).
+    lru_cache whose misses are serialized: concurrent episodes wait for the first load
+    instead of each building (and then discarding) its own copy of the model.
     """
+
+    def decorate(fn: Any) -> Any:
+        cached = functools.lru_cache(maxsize=maxsize)(fn)
+
+        @functools.wraps(fn)
+        def load(*args: str) -> Any:
+            with _MODEL_LOAD_LOCK:
+                return cached(*args)
+
+        return load
+
+    return decorate
+
+
+# Loaded models are kept per process: every episode reuses the same ONNX sessions
+# instead of re-reading the model files from disk for each synthesis.
+@_load_once(maxsize=2)
+def _load_g2p(g2p_dir: str) -> tuple[Any, Any]:
     try:
         from transformers import AutoTokenizer  # type: ignore
         from optimum.onnxruntime import ORTModelForCausalLM  # type: ignore
     except Exception as e:  # pragma: no cover
         raise RuntimeError("Missing dependency: transformers and optimum.onnxruntime") from e
 
-    tokenizer = AutoTokenizer.from_pretrained(str(g2p_dir))
-    model = ORTModelForCausalLM.from_pretrained(str(g2p_dir))
+    return AutoTokenizer.from_pretrained(g2p_dir), ORTModelForCausalLM.from_pretrained(g2p_dir)
+
+
+@_load_once(maxsize=4)
+def _load_piper(voice_model_path: str, voice_config_path: str) -> Any:
+    try:
+        from piper_onnx import Piper  # type: ignore
+    except Exception as e:  # pragma: no cover
+        raise RuntimeError("Missing dependency: piper-onnx and soundfile") from e
+
+    return Piper(voice_model_path, voice_config_path)
+
+
+@_load_once(maxsize=2)
+def _load_phonikud(model_path: str) -> Any:
+    try:
+        from phonikud_onnx import Phonikud  # type: ignore
+    except Exception as e:  # pragma: no cover
+        raise RuntimeError("Missing dependency: phonikud and phonikud-onnx") from e
+
+    return Phonikud(model_path)
+
+
+def _hebrew_to_phonemes(text: str, g2p_dir: pathlib.Path) -> str:
+    """
+    Hebrew -> IPA phonemes, using the community ONNX model (optimum-onnx + transformers).
+    """
+    tokenizer, model = _load_g2p(str(g2p_dir))
 
     system_message = (
         "Given the following Hebrew sentence, convert it to IPA phonemes.\n"
@@ -184,12 +237,11 @@ def _phonemes_to_wav(phonemes: str, voice_model_path: pathlib.Path, voice_config
     IPA phonemes -> audio WAV using piper-onnx.
     """
     try:
-        from piper_onnx import Piper  # type: ignore
         import soundfile as sf  # type: ignore
     except Exception as e:  # pragma: no cover
         raise RuntimeError("Missing dependency: piper-onnx and soundfile") from e
 
-    tts = Piper(str(voice_model_path), str(voice_config_path))
+    tts = _load_piper(str(voice_model_path), str(voice_config_path))
     samples, sample_rate = tts.create(phonemes, is_phonemes=True)
     sf.write(str(out_wav_path), samples, sample_rate)
 
@@ -264,13 +316,12 @@ def _text_to_phonemes_via_phonikud(text: str, cfg: OfflineHebrewTTSConfig, cache
       text -> (add diacritics via ONNX) -> phonemize(diacritics) -> IPA-ish phonemes string
     """
     try:
-        from phonikud_onnx import Phonikud  # type: ignore
         from phonikud import phonemize  # type: ignore
     except Exception as e:  # pragma: no cover
         raise RuntimeError("Missing dependency: phonikud and phonikud-onnx") from e
 
     model_path = _ensure_phonikud_model(cfg, cache_root)
-    phonikud = Phonikud(str(model_path))
+    phonikud = _load_phonikud(str(model_path))
     vocalized = phonikud.add_diacritics(text)
     phonemes = phonemize(vocalized)
     return phonemes.strip()
@@ -283,12 +334,11 @@ def _text_to_wav_via_piper(text: str, voice_model_path: pathlib.Path, voice_conf
     This is a fallback when the Hebrew G2P model is not accessible (e.g., gated HF repo).
     """
     try:
-        from piper_onnx import Piper  # type: ignore
         import soundfile as sf  # type: ignore
     except Exception as e:  # pragma: no cover
         raise RuntimeError("Missing dependency: piper-onnx and soundfile") from e
 
-    tts = Piper(str(voice_model_path), str(voice_config_path))
+    tts = _load_piper(str(voice_model_path), str(voice_config_path))
     samples, sample_rate = tts.create(text, is_phonemes=False)
     sf.write(str(out_wav_path), samples, sample_rate)
 
@@ -301,9 +351,12 @@ def synthesize_hebrew_audio(text: str, cfg: OfflineHebrewTTSConfig | None = None
     - Returns path to a generated audio file (WAV by default)
     """
     cfg = cfg or OfflineHebrewTTSConfig()
-    g2p_dir, voice_model_path, voice_config_path = _download_models(cfg)
-    cache_root = _get_cache_root(cfg)
-    voice_config_to_use = _resolve_voice_config_path(voice_config_path, cache_root, length_scale, cfg)
+    # Model downloads and the generated voice config share files in the cache dir;
+    # serialize that part when several companies are synthesized concurrently.
+    with _SETUP_LOCK:
+        g2p_dir, voice_model_path, voice_config_path = _download_models(cfg)
+        cache_root = _get_cache_root(cfg)
+        voice_config_to_use = _resolve_voice_config_path(voice_config_path, cache_root, length_scale, cfg)
 
     fd, out_path = tempfile.mkstemp(suffix=cfg.output_suffix)
     os.close(fd)
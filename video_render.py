@@ -0,0 +1,152 @@
+import functools
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class VideoEncoder:
+    codec: str
+    ffmpeg_params: tuple[str, ...] = ()
+
+
+# Hardware H.264 encoders in order of preference, then the libx264 CPU fallback.
+_HW_ENCODERS: tuple[VideoEncoder, ...] = (
+    VideoEncoder("h264_nvenc", ("-preset", "p4", "-tune", "ll", "-rc", "vbr", "-b:v", "2M")),  # NVIDIA
+    VideoEncoder("h264_qsv", ("-b:v", "2M")),  # Intel Quick Sync
+    VideoEncoder("h264_amf", ("-b:v", "2M")),  # AMD
+    VideoEncoder("h264_videotoolbox", ("-b:v", "2M")),  # macOS
+)
+# stillimage: the frame never changes, so x264 can skip-code nearly everything after the first frame.
+_CPU_ENCODER = VideoEncoder("libx264", ("-preset", "veryfast", "-tune", "stillimage"))
+
+
+# Output-side muxer options (they must follow the inputs). `-shortest` alone lets the muxer keep
+# interleaving the endless looped image well past the audio end (a 180 s track came out minutes
+# longer); with these the muxer cuts every stream when the audio ends.
+_SHORTEST_MUX = ("-fflags", "+shortest", "-max_interleave_delta", "0")
+
+
+def ffmpeg_exe() -> str:
+    """
+    ffmpeg binary bundled with imageio-ffmpeg; falls back to `ffmpeg` on PATH.
+    """
+    try:
+        import imageio_ffmpeg  # type: ignore
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def _encoder_works(exe: str, codec: str) -> bool:
+    # `ffmpeg -encoders` lists encoders compiled in, not whether the hardware is present,
+    # so probe with a tiny real encode.
+    try:
+        proc = subprocess.run(
+            [
+                exe, "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+                "-frames:v", "1", "-c:v", codec, "-f", "null", "-",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return proc.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def detect_h264_encoder() -> VideoEncoder:
+    """
+    Pick the fastest working H.264 encoder on this host (probed once per process).
+
+    Optional runtime control:
+      VIDEO_ENCODER=libx264  (force a specific ffmpeg encoder)
+    """
+    forced = os.environ.get("VIDEO_ENCODER", "").strip()
+    if forced:
+        for enc in (*_HW_ENCODERS, _CPU_ENCODER):
+            if enc.codec == forced:
+                return enc
+        return VideoEncoder(forced)
+
+    exe = ffmpeg_exe()
+    for enc in _HW_ENCODERS:
+        if _encoder_works(exe, enc.codec):
+            return enc
+    return _CPU_ENCODER
+
+
+def _encode_still_clip(image_path: str, out_path: str) -> str:
+    """
+    Encode the image once as a 1-frame (IDR) H.264 clip that can be stream-copied in a loop.
+    """
+    encoder = detect_h264_encoder()
+    cmd = [
+        ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+        "-framerate", "1", "-i", image_path,
+        "-frames:v", "1", "-r", "1",
+        "-c:v", encoder.codec, *encoder.ffmpeg_params,
+        "-pix_fmt", "yuv420p",
+        out_path,
+    ]
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def _encode_looped_still(image_path: str, audio_path: str, out_path: str) -> str:
+    # Single ffmpeg call: the image is looped as a 1 fps input and encoded at 1 fps for the whole duration.
+    encoder = detect_h264_encoder()
+    cmd = [
+        ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+        "-loop", "1", "-framerate", "1", "-i", image_path,
+        "-i", audio_path,
+        "-r", "1",
+        "-c:v", encoder.codec, *encoder.ffmpeg_params,
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-shortest",
+        *_SHORTEST_MUX,
+        out_path,
+    ]
+    subprocess.run(cmd, check=True)
+    return out_path
+
+
+def render_still_video(image_path: str, audio_path: str, out_path: str) -> str:
+    """
+    Mux one still image with an audio track into an H.264/AAC MP4 lasting as long as the audio.
+
+    The image is encoded once into a 1-frame clip which is then looped with `-c:v copy`,
+    so the video track is never re-encoded for the episode length. Falls back to a
+    single looped-image encode if the stream-copy path fails.
+    """
+    fd, clip_path = tempfile.mkstemp(suffix=".still.mp4")
+    os.close(fd)
+    try:
+        _encode_still_clip(image_path, clip_path)
+        cmd = [
+            ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error",
+            "-stream_loop", "-1", "-i", clip_path,
+            "-i", audio_path,
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-shortest",
+            *_SHORTEST_MUX,
+            out_path,
+        ]
+        subprocess.run(cmd, check=True)
+        return out_path
+    except subprocess.CalledProcessError as e:
+        print(f"[WARN] still-clip stream copy failed ({e}); re-encoding looped image instead")
+        return _encode_looped_still(image_path, audio_path, out_path)
+    finally:
+        try:
+            os.remove(clip_path)
+        except OSError:
+            pass